@@ -0,0 +1,55 @@
+"""
+Migration script to add class_name column to batches table
+Backfills it from the "<class> - <subject>" descriptions written so far
+"""
+from app import create_app
+from models import db, BATCH_CLASSES
+from sqlalchemy import text
+
+def migrate():
+    """Add class_name column to batches table and backfill it"""
+    app = create_app()
+    with app.app_context():
+        try:
+            # Check if column already exists
+            from sqlalchemy import inspect
+            inspector = inspect(db.engine)
+            columns = [col['name'] for col in inspector.get_columns('batches')]
+            
+            if 'class_name' in columns:
+                print("✅ Column 'class_name' already exists in batches table")
+            else:
+                # Add the column
+                print("📝 Adding 'class_name' column to batches table...")
+                allowed = ', '.join(f"'{class_name}'" for class_name in BATCH_CLASSES)
+                db.session.execute(
+                    text('ALTER TABLE batches ADD COLUMN class_name VARCHAR(32) NULL '
+                         f'CONSTRAINT ck_batches_class_name CHECK (class_name IN ({allowed}))')
+                )
+            
+            # Backfill from descriptions, skipping anything that isn't a known class
+            print("📝 Backfilling 'class_name' from batch descriptions...")
+            rows = db.session.execute(
+                text('SELECT id, description FROM batches WHERE class_name IS NULL')
+            ).all()
+            updated = 0
+            for batch_id, description in rows:
+                if not description or ' - ' not in description:
+                    continue
+                class_name = description.split(' - ')[0]
+                if class_name in BATCH_CLASSES:
+                    db.session.execute(
+                        text('UPDATE batches SET class_name = :class_name WHERE id = :id'),
+                        {'class_name': class_name, 'id': batch_id}
+                    )
+                    updated += 1
+            
+            db.session.commit()
+            print(f"✅ Successfully added 'class_name' column! Backfilled {updated} of {len(rows)} batches")
+            
+        except Exception as e:
+            print(f"❌ Error during migration: {e}")
+            db.session.rollback()
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,46 @@
+"""
+Migration script to add a unique constraint on batches.name
+"""
+from app import create_app
+from models import db
+from sqlalchemy import text
+
+def migrate():
+    """Add uq_batches_name unique index to batches table"""
+    app = create_app()
+    with app.app_context():
+        try:
+            # Check if constraint already exists
+            from sqlalchemy import inspect
+            inspector = inspect(db.engine)
+            existing = [index['name'] for index in inspector.get_indexes('batches')]
+            existing += [constraint['name'] for constraint in inspector.get_unique_constraints('batches')]
+            
+            if 'uq_batches_name' in existing:
+                print("✅ Constraint 'uq_batches_name' already exists on batches table")
+                return
+            
+            # Duplicate names must be resolved by hand before the constraint can be added
+            duplicates = db.session.execute(
+                text('SELECT name, COUNT(*) FROM batches GROUP BY name HAVING COUNT(*) > 1')
+            ).all()
+            if duplicates:
+                print("❌ Cannot add constraint, these batch names are used more than once:")
+                for name, count in duplicates:
+                    print(f"  • {name} ({count} batches)")
+                return
+            
+            # Add the constraint (a unique index works on both SQLite and MySQL)
+            print("📝 Adding unique constraint 'uq_batches_name' to batches table...")
+            db.session.execute(
+                text('CREATE UNIQUE INDEX uq_batches_name ON batches (name)')
+            )
+            db.session.commit()
+            print("✅ Successfully added 'uq_batches_name' constraint!")
+            
+        except Exception as e:
+            print(f"❌ Error during migration: {e}")
+            db.session.rollback()
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,39 @@
+"""
+Migration script to add a FULLTEXT index for batch search (MySQL only)
+"""
+from app import create_app
+from models import db
+from sqlalchemy import text
+
+def migrate():
+    """Add FULLTEXT index on batches(name, description)"""
+    app = create_app()
+    with app.app_context():
+        try:
+            if db.engine.dialect.name != 'mysql':
+                print("⏭️  Not a MySQL database - batch search uses LIKE, nothing to do")
+                return
+            
+            # Check if index already exists
+            from sqlalchemy import inspect
+            inspector = inspect(db.engine)
+            indexes = [index['name'] for index in inspector.get_indexes('batches')]
+            
+            if 'ix_batches_fulltext' in indexes:
+                print("✅ Index 'ix_batches_fulltext' already exists on batches table")
+                return
+            
+            # Add the index
+            print("📝 Adding FULLTEXT index 'ix_batches_fulltext' to batches table...")
+            db.session.execute(
+                text('CREATE FULLTEXT INDEX ix_batches_fulltext ON batches (name, description)')
+            )
+            db.session.commit()
+            print("✅ Successfully added 'ix_batches_fulltext' index!")
+            
+        except Exception as e:
+            print(f"❌ Error during migration: {e}")
+            db.session.rollback()
+
+if __name__ == '__main__':
+    migrate()
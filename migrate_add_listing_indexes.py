@@ -0,0 +1,44 @@
+"""
+Migration script to add composite indexes for batch and monthly exam listings
+"""
+from app import create_app
+from models import db
+from sqlalchemy import text
+
+INDEXES = [
+    ('batches', 'ix_batches_archived_created',
+     'CREATE INDEX ix_batches_archived_created ON batches (is_archived, created_at DESC, id DESC)'),
+    ('batches', 'ix_batches_active_archived_name',
+     'CREATE INDEX ix_batches_active_archived_name ON batches (is_active, is_archived, name)'),
+    ('monthly_exams', 'ix_monthly_exams_batch_time',
+     'CREATE INDEX ix_monthly_exams_batch_time ON monthly_exams (batch_id, year DESC, month DESC)'),
+]
+
+def migrate():
+    """Add listing indexes to batches and monthly_exams tables"""
+    app = create_app()
+    with app.app_context():
+        try:
+            from sqlalchemy import inspect
+            inspector = inspect(db.engine)
+            
+            for table, name, sql in INDEXES:
+                # Check if index already exists
+                indexes = [index['name'] for index in inspector.get_indexes(table)]
+                if name in indexes:
+                    print(f"✅ Index '{name}' already exists on {table} table")
+                    continue
+                
+                # Add the index
+                print(f"📝 Adding index '{name}' to {table} table...")
+                db.session.execute(text(sql))
+                print(f"✅ Successfully added '{name}' index!")
+            
+            db.session.commit()
+            
+        except Exception as e:
+            print(f"❌ Error during migration: {e}")
+            db.session.rollback()
+
+if __name__ == '__main__':
+    migrate()
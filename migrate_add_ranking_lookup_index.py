@@ -0,0 +1,36 @@
+"""
+Migration script to add a composite index for final ranking lookups
+"""
+from app import create_app
+from models import db
+from sqlalchemy import text
+
+def migrate():
+    """Add (monthly_exam_id, is_final, user_id) index to monthly_rankings table"""
+    app = create_app()
+    with app.app_context():
+        try:
+            # Check if index already exists
+            from sqlalchemy import inspect
+            inspector = inspect(db.engine)
+            indexes = [index['name'] for index in inspector.get_indexes('monthly_rankings')]
+            
+            if 'ix_monthly_rankings_exam_final_user' in indexes:
+                print("✅ Index 'ix_monthly_rankings_exam_final_user' already exists on monthly_rankings table")
+                return
+            
+            # Add the index
+            print("📝 Adding index 'ix_monthly_rankings_exam_final_user' to monthly_rankings table...")
+            db.session.execute(
+                text('CREATE INDEX ix_monthly_rankings_exam_final_user '
+                     'ON monthly_rankings (monthly_exam_id, is_final, user_id)')
+            )
+            db.session.commit()
+            print("✅ Successfully added 'ix_monthly_rankings_exam_final_user' index!")
+            
+        except Exception as e:
+            print(f"❌ Error during migration: {e}")
+            db.session.rollback()
+
+if __name__ == '__main__':
+    migrate()
@@ -48,6 +48,13 @@ class AttendanceStatus(Enum):
     ABSENT = "absent"
     LATE = "late"
 
+# Classes a batch can be created for
+BATCH_CLASSES = (
+    'Class 1', 'Class 2', 'Class 3', 'Class 4', 'Class 5',
+    'Class 6', 'Class 7', 'Class 8', 'Class 9', 'Class 10',
+    'HSC 1st Year', 'HSC 2nd Year'
+)
+
 # Association Tables for Many-to-Many Relationships
 user_batches = db.Table('user_batches',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
@@ -140,6 +147,7 @@ class Batch(db.Model):
     code = db.Column(db.String(50), unique=True, nullable=True)
     description = db.Column(db.Text, nullable=True)
     subject = db.Column(db.String(255), nullable=True)
+    class_name = db.Column(db.String(32), nullable=True)  # One of BATCH_CLASSES
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=True)
     fee_amount = db.Column(Numeric(10, 2), default=0.00)
@@ -162,6 +170,20 @@ class Batch(db.Model):
     attendance_records = db.relationship('Attendance', back_populates='batch')
     monthly_results = db.relationship('MonthlyResult', back_populates='batch')
     
+    __table_args__ = (
+        db.UniqueConstraint('name', name='uq_batches_name'),
+        db.CheckConstraint(
+            f"class_name IN ({', '.join(repr(c) for c in BATCH_CLASSES)})",
+            name='ck_batches_class_name'
+        ),
+        # Full-text index backing batch search (MySQL only, SQLite falls back to LIKE)
+        db.Index('ix_batches_fulltext', 'name', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        # Batch list: non-archived, newest first (keyset on created_at, id)
+        db.Index('ix_batches_archived_created', 'is_archived', db.text('created_at DESC'), db.text('id DESC')),
+        # Active batch dropdown: active, non-archived, ordered by name
+        db.Index('ix_batches_active_archived_name', 'is_active', 'is_archived', 'name'),
+    )
+    
     @property
     def current_students(self):
         """Count of currently enrolled students"""
@@ -488,6 +510,11 @@ class MonthlyExam(db.Model):
     individual_exams = db.relationship('IndividualExam', back_populates='monthly_exam')
     monthly_marks = db.relationship('MonthlyMark', back_populates='monthly_exam')
     
+    # Latest exam per batch
+    __table_args__ = (
+        db.Index('ix_monthly_exams_batch_time', 'batch_id', db.text('year DESC'), db.text('month DESC')),
+    )
+    
     def __repr__(self):
         return f'<MonthlyExam {self.title} - {self.month}/{self.year}>'
 
@@ -590,7 +617,11 @@ class MonthlyRanking(db.Model):
     monthly_exam = db.relationship('MonthlyExam')
     user = db.relationship('User')
     
-    __table_args__ = (db.UniqueConstraint('monthly_exam_id', 'user_id', name='unique_monthly_ranking'),)
+    __table_args__ = (
+        db.UniqueConstraint('monthly_exam_id', 'user_id', name='unique_monthly_ranking'),
+        # Covers the final-ranking lookup joined into batch student lists
+        db.Index('ix_monthly_rankings_exam_final_user', 'monthly_exam_id', 'is_final', 'user_id'),
+    )
     
     def __repr__(self):
         return f'<MonthlyRanking {self.position} - User {self.user_id}>'
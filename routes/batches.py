@@ -3,64 +3,210 @@ Batch Management Routes
 CRUD operations for batches and student enrollment
 """
 from flask import Blueprint, request
-from models import db, Batch, User, UserRole, user_batches
+from models import db, Batch, User, UserRole, user_batches, BATCH_CLASSES, MonthlyExam, MonthlyRanking
 from utils.auth import login_required, require_role, get_current_user
-from utils.response import success_response, error_response, paginated_response, serialize_batch
-from sqlalchemy import or_
+from utils.response import success_response, raw_success_response, error_response, paginated_response, serialize_batch, fast_json, utcnow
+from sqlalchemy import or_, and_, func, select, update, event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.mysql import match
 from datetime import datetime, date
 from decimal import Decimal
+from cachelib import SimpleCache
+from typing import Annotated
+import msgspec
+import base64
+import re
 
 batches_bp = Blueprint('batches', __name__)
 
+# Allowed batch classes and subjects, in display order for error messages
+SUBJECT_CHOICES = (
+    'Mathematics', 'Higher Mathematics', 'Physics', 'Chemistry', 
+    'Biology', 'English', 'Bangla', 'ICT', 'General Science'
+)
+ALLOWED_CLASSES = frozenset(BATCH_CLASSES)
+ALLOWED_SUBJECTS = frozenset(SUBJECT_CHOICES)
+_CLASSES_STR = ', '.join(BATCH_CLASSES)
+_SUBJECTS_STR = ', '.join(SUBJECT_CHOICES)
+
+# Request bodies, validated in one pass by msgspec (unknown fields are ignored)
+NonEmptyStr = Annotated[str, msgspec.Meta(min_length=1)]
+
+class CreateBatchIn(msgspec.Struct):
+    """Body of POST /api/batches"""
+    name: NonEmptyStr
+    class_: NonEmptyStr = msgspec.field(name='class')
+    subject: NonEmptyStr
+
+class UpdateBatchIn(msgspec.Struct):
+    """Body of PUT /api/batches/<id>; omitted fields are left unchanged, as are null class/subject"""
+    name: NonEmptyStr | msgspec.UnsetType = msgspec.UNSET
+    class_: str | None | msgspec.UnsetType = msgspec.field(default=msgspec.UNSET, name='class')
+    subject: str | None | msgspec.UnsetType = msgspec.UNSET
+
+class ArchiveBatchIn(msgspec.Struct):
+    """Body of POST /api/batches/<id>/archive; a null reason uses the default"""
+    reason: str | None = None
+
+def _decode_body(struct_type, required=True):
+    """Decode the JSON request body into struct_type, returning (data, error response)"""
+    body = request.get_data()
+    if not body:
+        if required:
+            return None, error_response('Request data is required', 400)
+        body = b'{}'
+    
+    try:
+        return msgspec.json.decode(body, type=struct_type), None
+    except msgspec.DecodeError as e:
+        return None, error_response(f'Invalid request data: {e}', 400)
+
+# Short-lived per-process cache for slow-changing batch listings
+_batch_list_cache = SimpleCache(threshold=4, default_timeout=60)
+
+def _clear_batch_list_cache(mapper, connection, target):
+    """Drop cached listings whenever a batch is written (enrollment changes dirty the batch too)"""
+    _batch_list_cache.clear()
+
+def _clear_batch_list_cache_for_user(mapper, connection, target):
+    """Drop cached listings only when a user's active or archived flag changed"""
+    attrs = inspect(target).attrs
+    if attrs.is_active.history.has_changes() or attrs.is_archived.history.has_changes():
+        _batch_list_cache.clear()
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Batch, _event_name, _clear_batch_list_cache)
+event.listen(User, 'after_update', _clear_batch_list_cache_for_user)
+event.listen(User, 'after_delete', _clear_batch_list_cache)
+
+# Search terms MySQL's FULLTEXT index can serve (innodb_ft_min_token_size defaults to 3)
+FULLTEXT_TERM = re.compile(r'[A-Za-z0-9]{3,}')
+
+def _student_counts(batch_ids, *criteria):
+    """Count enrolled users per batch in one grouped query, keyed by batch id"""
+    if not batch_ids:
+        return {}
+    
+    rows = db.session.query(
+        user_batches.c.batch_id, func.count()
+    ).join(
+        User, User.id == user_batches.c.user_id
+    ).filter(
+        user_batches.c.batch_id.in_(batch_ids), *criteria
+    ).group_by(user_batches.c.batch_id).all()
+    
+    return dict(rows)
+
+def _search_filter(search):
+    """Match batch name/description, using the FULLTEXT index on MySQL"""
+    terms = search.split()
+    if db.engine.dialect.name == 'mysql' and all(FULLTEXT_TERM.fullmatch(term) for term in terms):
+        # Every term must match, each as a word prefix
+        return match(
+            Batch.name, Batch.description,
+            against=' '.join(f'+{term}*' for term in terms)
+        ).in_boolean_mode()
+    
+    return or_(
+        Batch.name.ilike(f'%{search}%'),
+        Batch.description.ilike(f'%{search}%')
+    )
+
+def _encode_cursor(batch):
+    """Build an opaque cursor pointing just past this batch in the list order"""
+    created_at = batch.created_at.isoformat() if batch.created_at else ''
+    return base64.urlsafe_b64encode(f'{created_at}|{batch.id}'.encode()).decode()
+
+def _decode_cursor(cursor):
+    """Return (created_at, id) from a cursor; raises ValueError if malformed"""
+    created_at, batch_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return (datetime.fromisoformat(created_at) if created_at else None), int(batch_id)
+
+def _after_cursor(created_at, batch_id):
+    """Filter for batches ordered after the cursor by (created_at DESC, id DESC)"""
+    # NULL created_at sorts last in descending order (SQLite and MySQL)
+    if created_at is None:
+        return and_(Batch.created_at.is_(None), Batch.id < batch_id)
+    # Expanded rather than a row comparison so MySQL can range-scan the index
+    return or_(
+        Batch.created_at < created_at,
+        and_(Batch.created_at == created_at, Batch.id < batch_id),
+        Batch.created_at.is_(None)
+    )
+
 @batches_bp.route('', methods=['GET'])
 @login_required
 def get_batches():
-    """Get all batches with pagination (excludes archived by default)"""
+    """Get batches with keyset pagination (excludes archived by default)
+    
+    Pass the returned next_cursor as ?cursor= to fetch the following page.
+    ?page= offset pagination is deprecated and kept for older clients.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        cursor = request.args.get('cursor')
+        page = request.args.get('page', type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        if per_page < 1:
+            per_page = 20  # Same fallback paginate() used for non-positive sizes
+        per_page = min(per_page, 100)
         search = request.args.get('search', '').strip()
         
-        query = Batch.query
-        
         # Exclude archived batches by default
-        query = query.filter_by(is_archived=False)
+        query = select(Batch).where(Batch.is_archived == False)
         
         # Search filter
         if search:
-            search_filter = or_(
-                Batch.name.ilike(f'%{search}%'),
-                Batch.description.ilike(f'%{search}%')
-            )
-            query = query.filter(search_filter)
-        
-        # Order by creation date
-        query = query.order_by(Batch.created_at.desc())
+            query = query.where(_search_filter(search))
+        
+        # Order by creation date, id breaks ties so the order is stable
+        query = query.order_by(Batch.created_at.desc(), Batch.id.desc())
+        
+        if page is not None and not cursor:
+            # Deprecated offset pagination, without paginate()'s COUNT(*);
+            # per_page is already clamped above, page is clamped like paginate()
+            page = max(page, 1)
+            items = db.session.execute(
+                query.offset((page - 1) * per_page).limit(per_page + 1)
+            ).scalars().all()
+            has_more = len(items) > per_page
+            items = items[:per_page]
+            pagination_info = {
+                'page': page,
+                'per_page': per_page,
+                'has_more': has_more
+            }
+        else:
+            if cursor:
+                try:
+                    query = query.where(_after_cursor(*_decode_cursor(cursor)))
+                except ValueError:
+                    return error_response('Invalid cursor', 400)
+            
+            # Fetch one extra row to learn whether another page exists
+            items = db.session.execute(query.limit(per_page + 1)).scalars().all()
+            has_more = len(items) > per_page
+            items = items[:per_page]
+            pagination_info = {
+                'per_page': per_page,
+                'has_more': has_more,
+                'next_cursor': _encode_cursor(items[-1]) if has_more else None
+            }
         
-        # Paginate
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
+        # Count active students for the whole page in a single query
+        student_counts = _student_counts(
+            [batch.id for batch in items],
+            User.is_active == True
         )
         
         batches_data = []
-        for batch in pagination.items:
-            batch_info = serialize_batch(batch)
-            
-            # Extract class from description if available
-            if ' - ' in batch.description:
-                class_name = batch.description.split(' - ')[0]
-                batch_info['class'] = class_name
-            
-            # Add current student count
-            batch_info['currentStudents'] = len([s for s in batch.students if s.is_active])
-            batch_info['maxStudents'] = batch.max_students or 50
-            
+        for batch in items:
+            # Pass the precomputed count so batch.students is never lazy-loaded
+            batch_info = serialize_batch(batch, student_counts.get(batch.id, 0))
             batches_data.append(batch_info)
         
         # Return simplified response for frontend compatibility
-        return success_response("Batches retrieved successfully", batches_data)
+        return raw_success_response("Batches retrieved successfully", fast_json(batches_data),
+                                    pagination=pagination_info)
         
     except Exception as e:
         return error_response(f'Failed to retrieve batches: {str(e)}', 500)
@@ -70,7 +216,7 @@ def get_batches():
 def get_batch(batch_id):
     """Get specific batch details"""
     try:
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
@@ -108,49 +254,29 @@ def get_batch(batch_id):
 def create_batch():
     """Create a new batch - requires name, class, and subject"""
     try:
-        data = request.get_json()
-        
-        if not data:
-            return error_response('Request data is required', 400)
-        
         # Required fields - name, class, and subject
-        required_fields = ['name', 'class', 'subject']
-        missing_fields = [field for field in required_fields if not data.get(field)]
-        
-        if missing_fields:
-            return error_response(f'Missing required fields: {", ".join(missing_fields)}', 400)
+        data, error = _decode_body(CreateBatchIn)
+        if error:
+            return error
         
         # Validate class is one of the allowed values
-        allowed_classes = [
-            'Class 1', 'Class 2', 'Class 3', 'Class 4', 'Class 5',
-            'Class 6', 'Class 7', 'Class 8', 'Class 9', 'Class 10',
-            'HSC 1st Year', 'HSC 2nd Year'
-        ]
-        class_name = data['class'].strip()
-        if class_name not in allowed_classes:
-            return error_response(f'Class must be one of: {", ".join(allowed_classes)}', 400)
+        class_name = data.class_.strip()
+        if class_name not in ALLOWED_CLASSES:
+            return error_response(f'Class must be one of: {_CLASSES_STR}', 400)
         
         # Validate subject is one of the allowed values
-        allowed_subjects = [
-            'Mathematics', 'Higher Mathematics', 'Physics', 'Chemistry', 
-            'Biology', 'English', 'Bangla', 'ICT', 'General Science'
-        ]
-        subject = data['subject'].strip()
-        if subject not in allowed_subjects:
-            return error_response(f'Subject must be one of: {", ".join(allowed_subjects)}', 400)
-        
-        # Check if batch name already exists
-        existing_batch = Batch.query.filter_by(name=data['name'].strip()).first()
-        if existing_batch:
-            return error_response('Batch with this name already exists', 409)
+        subject = data.subject.strip()
+        if subject not in ALLOWED_SUBJECTS:
+            return error_response(f'Subject must be one of: {_SUBJECTS_STR}', 400)
         
         # Use today as default start date
         start_date = date.today()
         
         # Create new batch with required fields
         batch = Batch(
-            name=data['name'].strip(),
+            name=data.name.strip(),
             subject=subject,
+            class_name=class_name,
             start_date=start_date,
             description=f"{class_name} - {subject}",
             status='active',
@@ -159,19 +285,17 @@ def create_batch():
             max_students=50
         )
         
-        # Store class information in the description or add a class field to the model
-        # For now, we'll include it in the description
-        batch.description = f"{class_name} - {subject}"
-        
         db.session.add(batch)
         db.session.commit()
         
         batch_data = serialize_batch(batch)
-        # Add class info to the response
-        batch_data['class'] = class_name
         
         return success_response('Batch created successfully', {'batch': batch_data}, 201)
         
+    except IntegrityError:
+        # uq_batches_name rejected a duplicate name
+        db.session.rollback()
+        return error_response('Batch with this name already exists', 409)
     except Exception as e:
         db.session.rollback()
         return error_response(f'Failed to create batch: {str(e)}', 500)
@@ -182,55 +306,33 @@ def create_batch():
 def update_batch(batch_id):
     """Update batch information"""
     try:
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
         
-        data = request.get_json()
-        
-        if not data:
-            return error_response('Request data is required', 400)
-        
-        # Check if new name conflicts with existing batch
-        if 'name' in data and data['name'].strip() != batch.name:
-            existing_batch = Batch.query.filter(
-                Batch.name == data['name'].strip(),
-                Batch.id != batch_id
-            ).first()
-            if existing_batch:
-                return error_response('Batch with this name already exists', 409)
+        data, error = _decode_body(UpdateBatchIn)
+        if error:
+            return error
         
         # Handle class and subject updates
-        if 'class' in data or 'subject' in data:
-            current_class = None
-            current_subject = batch.subject
-            
-            # Extract current class from description if it exists
-            if ' - ' in batch.description:
-                current_class = batch.description.split(' - ')[0]
-            
-            new_class = data.get('class', current_class)
-            new_subject = data.get('subject', current_subject)
+        # The edit form sends the whole serialized batch, so null means "unchanged" too
+        unchanged = (msgspec.UNSET, None)
+        if data.class_ not in unchanged or data.subject not in unchanged:
+            new_class = batch.class_name if data.class_ in unchanged else data.class_
+            new_subject = batch.subject if data.subject in unchanged else data.subject
             
             # Validate class if provided
             if new_class:
-                allowed_classes = [
-                    'Class 1', 'Class 2', 'Class 3', 'Class 4', 'Class 5',
-                    'Class 6', 'Class 7', 'Class 8', 'Class 9', 'Class 10',
-                    'HSC 1st Year', 'HSC 2nd Year'
-                ]
-                if new_class not in allowed_classes:
-                    return error_response(f'Class must be one of: {", ".join(allowed_classes)}', 400)
+                if new_class not in ALLOWED_CLASSES:
+                    return error_response(f'Class must be one of: {_CLASSES_STR}', 400)
+                
+                batch.class_name = new_class
             
             # Validate subject if provided
             if new_subject:
-                allowed_subjects = [
-                    'Mathematics', 'Higher Mathematics', 'Physics', 'Chemistry', 
-                    'Biology', 'English', 'Bangla', 'ICT', 'General Science'
-                ]
-                if new_subject not in allowed_subjects:
-                    return error_response(f'Subject must be one of: {", ".join(allowed_subjects)}', 400)
+                if new_subject not in ALLOWED_SUBJECTS:
+                    return error_response(f'Subject must be one of: {_SUBJECTS_STR}', 400)
                 
                 batch.subject = new_subject
             
@@ -239,37 +341,24 @@ def update_batch(batch_id):
                 batch.description = f"{new_class} - {new_subject}"
         
         # Update other allowed fields
-        updatable_fields = ['name']
-        
-        for field in updatable_fields:
-            if field in data:
-                if field in ['start_date', 'end_date'] and data[field]:
-                    try:
-                        setattr(batch, field, datetime.strptime(data[field], '%Y-%m-%d').date())
-                    except ValueError:
-                        return error_response(f'Invalid {field} format. Use YYYY-MM-DD', 400)
-                elif field == 'fee_amount' and data[field] is not None:
-                    try:
-                        fee_amount = Decimal(str(data[field]))
-                        if fee_amount < 0:
-                            return error_response('Fee amount cannot be negative', 400)
-                        setattr(batch, field, fee_amount)
-                    except (ValueError, TypeError):
-                        return error_response('Invalid fee amount', 400)
-                else:
-                    setattr(batch, field, data[field])
+        if data.name is not msgspec.UNSET:
+            batch.name = data.name.strip()
         
         # Validate date range
         if batch.end_date and batch.end_date <= batch.start_date:
             return error_response('End date must be after start date', 400)
         
-        batch.updated_at = datetime.utcnow()
+        batch.updated_at = utcnow()
         db.session.commit()
         
         batch_data = serialize_batch(batch)
         
         return success_response('Batch updated successfully', {'batch': batch_data})
         
+    except IntegrityError:
+        # uq_batches_name rejected a name already used by another batch
+        db.session.rollback()
+        return error_response('Batch with this name already exists', 409)
     except Exception as e:
         db.session.rollback()
         return error_response(f'Failed to update batch: {str(e)}', 500)
@@ -280,21 +369,21 @@ def update_batch(batch_id):
 def delete_batch(batch_id):
     """Delete a batch permanently (hard delete)"""
     try:
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
         
         # Check if batch has students enrolled
-        active_students = [s for s in batch.students if s.is_active]
-        if active_students:
-            return error_response(f'Cannot delete batch with {len(active_students)} active students. Please remove students first.', 400)
+        active_student_count = _student_counts([batch_id], User.is_active == True).get(batch_id, 0)
+        if active_student_count:
+            return error_response(f'Cannot delete batch with {active_student_count} active students. Please remove students first.', 400)
         
         # Hard delete - permanently remove from database
         batch_name = batch.name
         
-        # Remove all student associations first
-        batch.students.clear()
+        # Remove all student associations first, in one statement
+        db.session.execute(user_batches.delete().where(user_batches.c.batch_id == batch_id))
         
         # Delete the batch permanently
         db.session.delete(batch)
@@ -312,57 +401,60 @@ def delete_batch(batch_id):
 def get_batch_students(batch_id):
     """Get all students in a batch, sorted by roll number from most recent monthly exam"""
     try:
-        from models import MonthlyExam, MonthlyRanking
-        
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
         
-        # Find most recent monthly exam for this batch with finalized rankings
-        most_recent_exam = MonthlyExam.query.filter_by(
+        # Most recent monthly exam for this batch, inlined into the join below
+        most_recent_exam_id = db.session.query(MonthlyExam.id).filter_by(
             batch_id=batch_id
         ).order_by(
             MonthlyExam.year.desc(),
             MonthlyExam.month.desc()
-        ).first()
-        
-        # Build a map of user_id to current rank from most recent exam
-        rank_map = {}
-        if most_recent_exam:
-            rankings = MonthlyRanking.query.filter_by(
-                monthly_exam_id=most_recent_exam.id,
-                is_final=True
-            ).all()
-            
-            for ranking in rankings:
-                if ranking.position:
-                    rank_map[ranking.user_id] = ranking.position  # Use position as current rank
+        ).limit(1).scalar_subquery()
+        
+        # Active students with their finalized position from that exam,
+        # ranked students first (position NULLS LAST, portable to MySQL)
+        rows = db.session.query(
+            User, MonthlyRanking.position
+        ).join(
+            user_batches, user_batches.c.user_id == User.id
+        ).outerjoin(
+            MonthlyRanking, and_(
+                MonthlyRanking.user_id == User.id,
+                MonthlyRanking.monthly_exam_id == most_recent_exam_id,
+                MonthlyRanking.is_final == True
+            )
+        ).filter(
+            user_batches.c.batch_id == batch_id,
+            User.is_active == True
+        ).order_by(
+            MonthlyRanking.position.is_(None),
+            MonthlyRanking.position,
+            User.id
+        ).all()
         
         students = []
-        for student in batch.students:
-            if student.is_active:
-                student_data = {
-                    'id': student.id,
-                    'phoneNumber': student.phoneNumber,  # Correct field name
-                    'phone': student.phoneNumber,  # Add alias for compatibility
-                    'first_name': student.first_name,
-                    'last_name': student.last_name,
-                    'full_name': student.full_name,
-                    'email': student.email,
-                    'student_id': student.student_id,  # Generated student ID property
-                    'guardian_phone': student.guardian_phone,
-                    'emergency_contact': student.emergency_contact,
-                    'created_at': student.created_at.isoformat(),
-                    'roll_number': rank_map.get(student.id),  # Current rank as roll number
-                    'current_rank': rank_map.get(student.id)  # Current rank
-                }
-                students.append(student_data)
-        
-        # Sort students by current rank (students without rank go to the end)
-        students.sort(key=lambda s: (s['current_rank'] is None, s['current_rank'] if s['current_rank'] else 999999))
-        
-        return success_response('Batch students retrieved', {'students': students})
+        for student, position in rows:
+            student_data = {
+                'id': student.id,
+                'phoneNumber': student.phoneNumber,  # Correct field name
+                'phone': student.phoneNumber,  # Add alias for compatibility
+                'first_name': student.first_name,
+                'last_name': student.last_name,
+                'full_name': student.full_name,
+                'email': student.email,
+                'student_id': student.student_id,  # Generated student ID property
+                'guardian_phone': student.guardian_phone,
+                'emergency_contact': student.emergency_contact,
+                'created_at': student.created_at,  # Formatted by fast_json
+                'roll_number': position,  # Current rank as roll number
+                'current_rank': position  # Current rank
+            }
+            students.append(student_data)
+        
+        return raw_success_response('Batch students retrieved', fast_json({'students': students}))
         
     except Exception as e:
         return error_response(f'Failed to get batch students: {str(e)}', 500)
@@ -373,7 +465,7 @@ def get_batch_students(batch_id):
 def add_student_to_batch(batch_id):
     """Add a student to a batch"""
     try:
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
@@ -384,7 +476,13 @@ def add_student_to_batch(batch_id):
         if not student_id:
             return error_response('Student ID is required', 400)
         
-        student = User.query.filter_by(id=student_id, role=UserRole.STUDENT, is_active=True).first()
+        student = db.session.execute(
+            select(User).where(
+                User.id == student_id,
+                User.role == UserRole.STUDENT,
+                User.is_active == True
+            )
+        ).scalar_one_or_none()
         
         if not student:
             return error_response('Student not found', 404)
@@ -409,12 +507,14 @@ def add_student_to_batch(batch_id):
 def remove_student_from_batch(batch_id, student_id):
     """Remove a student from a batch"""
     try:
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
         
-        student = User.query.filter_by(id=student_id, role=UserRole.STUDENT).first()
+        student = db.session.execute(
+            select(User).where(User.id == student_id, User.role == UserRole.STUDENT)
+        ).scalar_one_or_none()
         
         if not student:
             return error_response('Student not found', 404)
@@ -441,15 +541,20 @@ def get_my_batches():
     try:
         current_user = get_current_user()
         
+        active_batches = [batch for batch in current_user.batches if batch.is_active]
+        student_counts = _student_counts(
+            [batch.id for batch in active_batches],
+            User.is_active == True
+        )
+        
         batches = []
-        for batch in current_user.batches:
-            if batch.is_active:
-                batch_data = serialize_batch(batch)
-                
-                # Add student-specific information
-                batch_data['enrollment_date'] = None  # This would need to be added to the association table
-                
-                batches.append(batch_data)
+        for batch in active_batches:
+            batch_data = serialize_batch(batch, student_counts.get(batch.id, 0))
+            
+            # Add student-specific information
+            batch_data['enrollment_date'] = None  # This would need to be added to the association table
+            
+            batches.append(batch_data)
         
         return success_response('Student batches retrieved', {'batches': batches})
         
@@ -461,7 +566,23 @@ def get_my_batches():
 def get_active_batches():
     """Get all active batches (simplified list) - excludes archived"""
     try:
-        batches = Batch.query.filter_by(is_active=True, is_archived=False).order_by(Batch.name).all()
+        # Cached as encoded JSON so hits skip serialization entirely
+        cached = _batch_list_cache.get('active')
+        if cached is not None:
+            return raw_success_response('Active batches retrieved', cached)
+        
+        batches = db.session.execute(
+            select(Batch).where(
+                Batch.is_active == True,
+                Batch.is_archived == False
+            ).order_by(Batch.name)
+        ).scalars().all()
+        
+        student_counts = _student_counts(
+            [batch.id for batch in batches],
+            User.is_active == True,
+            User.is_archived == False
+        )
         
         batches_data = []
         for batch in batches:
@@ -470,13 +591,16 @@ def get_active_batches():
                 'name': batch.name,
                 'description': batch.description,
                 'fee_amount': float(batch.fee_amount),
-                'start_date': batch.start_date.isoformat(),
-                'end_date': batch.end_date.isoformat() if batch.end_date else None,
-                'student_count': len([s for s in batch.students if s.is_active and not s.is_archived])
+                'start_date': batch.start_date,
+                'end_date': batch.end_date,
+                'student_count': student_counts.get(batch.id, 0)
             }
             batches_data.append(batch_data)
         
-        return success_response('Active batches retrieved', {'batches': batches_data})
+        encoded = fast_json({'batches': batches_data})
+        _batch_list_cache.set('active', encoded)
+        
+        return raw_success_response('Active batches retrieved', encoded)
         
     except Exception as e:
         return error_response(f'Failed to get active batches: {str(e)}', 500)
@@ -492,7 +616,7 @@ def archive_batch(batch_id):
     """Archive a batch and all its students"""
     try:
         current_user = get_current_user()
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
@@ -501,24 +625,37 @@ def archive_batch(batch_id):
             return error_response('Batch is already archived', 400)
         
         # Get reason from request
-        data = request.get_json() or {}
-        reason = data.get('reason', 'Archived by teacher')
+        data, error = _decode_body(ArchiveBatchIn, required=False)
+        if error:
+            return error
+        reason = data.reason or 'Archived by teacher'
+        
+        # One timestamp for the batch and every student archived with it
+        now = utcnow()
         
         # Archive the batch
         batch.is_archived = True
-        batch.archived_at = datetime.utcnow()
+        batch.archived_at = now
         batch.archived_by = current_user.id
         batch.archive_reason = reason
         
-        # Archive all students in this batch
-        archived_students_count = 0
-        for student in batch.students:
-            if not student.is_archived and student.role == UserRole.STUDENT:
-                student.is_archived = True
-                student.archived_at = datetime.utcnow()
-                student.archived_by = current_user.id
-                student.archive_reason = f"Archived with batch: {batch.name}"
-                archived_students_count += 1
+        # Archive all students in this batch with a single UPDATE
+        result = db.session.execute(
+            update(User)
+            .where(User.id.in_(
+                select(user_batches.c.user_id).where(user_batches.c.batch_id == batch_id)
+            ))
+            .where(User.role == UserRole.STUDENT)
+            .where(User.is_archived == False)
+            .values(
+                is_archived=True,
+                archived_at=now,
+                archived_by=current_user.id,
+                archive_reason=f"Archived with batch: {batch.name}"
+            )
+            .execution_options(synchronize_session=False)
+        )
+        archived_students_count = result.rowcount
         
         db.session.commit()
         
@@ -541,7 +678,7 @@ def restore_batch(batch_id):
     """Restore an archived batch and optionally its students"""
     try:
         current_user = get_current_user()
-        batch = Batch.query.get(batch_id)
+        batch = db.session.get(Batch, batch_id)
         
         if not batch:
             return error_response('Batch not found', 404)
@@ -562,15 +699,24 @@ def restore_batch(batch_id):
         # Restore students if requested
         restored_students_count = 0
         if restore_students:
-            for student in batch.students:
-                if student.is_archived and student.role == UserRole.STUDENT:
-                    # Only restore if archived with this batch
-                    if student.archive_reason and f"Archived with batch: {batch.name}" in student.archive_reason:
-                        student.is_archived = False
-                        student.archived_at = None
-                        student.archived_by = None
-                        student.archive_reason = None
-                        restored_students_count += 1
+            # Only restore students that were archived with this batch
+            result = db.session.execute(
+                update(User)
+                .where(User.id.in_(
+                    select(user_batches.c.user_id).where(user_batches.c.batch_id == batch_id)
+                ))
+                .where(User.role == UserRole.STUDENT)
+                .where(User.is_archived == True)
+                .where(User.archive_reason == f"Archived with batch: {batch.name}")
+                .values(
+                    is_archived=False,
+                    archived_at=None,
+                    archived_by=None,
+                    archive_reason=None
+                )
+                .execution_options(synchronize_session=False)
+            )
+            restored_students_count = result.rowcount
         
         db.session.commit()
         
@@ -590,29 +736,70 @@ def restore_batch(batch_id):
 def get_archived_batches():
     """Get all archived batches"""
     try:
-        batches = Batch.query.filter_by(is_archived=True).order_by(Batch.archived_at.desc()).all()
+        # Archiving or restoring a batch changes the latest archived_at or the
+        # count, so the key moves on in every worker. Student changes (counts,
+        # enrollment) don't move it: those are cleared by the mapper events in
+        # this process only, so other workers can lag by up to the timeout.
+        last_archived_at, archived_count = db.session.execute(
+            select(func.max(Batch.archived_at), func.count()).where(Batch.is_archived == True)
+        ).one()
+        cache_key = f'archived:{last_archived_at}:{archived_count}'
+        
+        cached = _batch_list_cache.get(cache_key)
+        if cached is not None:
+            return raw_success_response('Archived batches retrieved', cached)
+        
+        batches = db.session.execute(
+            select(Batch).where(Batch.is_archived == True).order_by(Batch.archived_at.desc())
+        ).scalars().all()
+        batch_ids = [batch.id for batch in batches]
+        
+        # Look up everyone who archived these batches in a single query
+        archiver_ids = {batch.archived_by for batch in batches if batch.archived_by}
+        archiver_names = {
+            user.id: user.full_name
+            for user in db.session.execute(
+                select(User).where(User.id.in_(archiver_ids))
+            ).scalars()
+        } if archiver_ids else {}
+        
+        student_counts = _student_counts(batch_ids, User.is_active == True)
+        
+        # Count archived and total students per batch in one grouped query
+        archived_counts = {}
+        total_counts = {}
+        if batch_ids:
+            rows = db.session.query(
+                user_batches.c.batch_id, User.is_archived, func.count()
+            ).join(
+                User, User.id == user_batches.c.user_id
+            ).filter(
+                User.role == UserRole.STUDENT,
+                user_batches.c.batch_id.in_(batch_ids)
+            ).group_by(user_batches.c.batch_id, User.is_archived).all()
+            
+            for batch_id, is_archived, count in rows:
+                total_counts[batch_id] = total_counts.get(batch_id, 0) + count
+                if is_archived:
+                    archived_counts[batch_id] = count
         
         batches_data = []
         for batch in batches:
-            batch_data = serialize_batch(batch)
-            batch_data['archived_at'] = batch.archived_at.isoformat() if batch.archived_at else None
+            batch_data = serialize_batch(batch, student_counts.get(batch.id, 0))
             batch_data['archive_reason'] = batch.archive_reason
             
             # Get archived by user info
-            if batch.archived_by:
-                archived_by_user = User.query.get(batch.archived_by)
-                batch_data['archived_by_name'] = archived_by_user.full_name if archived_by_user else 'Unknown'
-            else:
-                batch_data['archived_by_name'] = 'Unknown'
+            batch_data['archived_by_name'] = archiver_names.get(batch.archived_by, 'Unknown')
             
-            # Count archived students in this batch
-            archived_student_count = len([s for s in batch.students if s.is_archived and s.role == UserRole.STUDENT])
-            batch_data['archived_students_count'] = archived_student_count
-            batch_data['total_students_count'] = len([s for s in batch.students if s.role == UserRole.STUDENT])
+            batch_data['archived_students_count'] = archived_counts.get(batch.id, 0)
+            batch_data['total_students_count'] = total_counts.get(batch.id, 0)
             
             batches_data.append(batch_data)
         
-        return success_response('Archived batches retrieved', {'batches': batches_data})
+        encoded = fast_json({'batches': batches_data})
+        _batch_list_cache.set(cache_key, encoded, timeout=60)
+        
+        return raw_success_response('Archived batches retrieved', encoded)
         
     except Exception as e:
         return error_response(f'Failed to get archived batches: {str(e)}', 500)
@@ -42,6 +42,23 @@ def test_batches_api():
         else:
             print(f"❌ Batches API failed: {batches_response.text}")
         
+        # Non-positive page sizes fall back to the default instead of erroring
+        print("\n📏 Testing batches API with per_page=0...")
+        zero_response = session.get(f"{base_url}/api/batches", params={'per_page': 0})
+        print(f"per_page=0 Status: {zero_response.status_code}")
+        if zero_response.status_code == 200:
+            print(f"✅ per_page=0 handled, pagination: {zero_response.json().get('pagination')}")
+        else:
+            print(f"❌ per_page=0 failed: {zero_response.text}")
+        
+        print("\n📏 Testing deprecated page pagination with page=0&per_page=-2...")
+        page_response = session.get(f"{base_url}/api/batches", params={'page': 0, 'per_page': -2})
+        print(f"page=0&per_page=-2 Status: {page_response.status_code}")
+        if page_response.status_code == 200:
+            print(f"✅ page pagination clamped, pagination: {page_response.json().get('pagination')}")
+        else:
+            print(f"❌ page pagination failed: {page_response.text}")
+        
         # Create a test batch
         print("\n➕ Testing batch creation...")
         create_response = session.post(f"{base_url}/api/batches", 
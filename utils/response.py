@@ -2,17 +2,29 @@
 Response Utilities
 Standardized response formats for API endpoints
 """
-from flask import jsonify
-from datetime import datetime, date
+from flask import jsonify, Response
+from datetime import datetime, date, timezone
 from decimal import Decimal
 from functools import wraps
+import msgspec
+
+# Reusable encoder: datetimes/dates as ISO 8601, Decimals as JSON numbers
+_json_encoder = msgspec.json.Encoder(decimal_format='number')
+
+def fast_json(data):
+    """Encode plain data (dicts, lists, scalars, datetimes, Decimals) to JSON bytes"""
+    return _json_encoder.encode(data)
+
+def utcnow():
+    """Current UTC time as a naive datetime, matching how timestamp columns are stored"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 def success_response(message="Success", data=None, status_code=200):
     """Create a standardized success response"""
     response = {
         'success': True,
         'message': message,
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': utcnow().isoformat()
     }
     
     if data is not None:
@@ -20,12 +32,26 @@ def success_response(message="Success", data=None, status_code=200):
     
     return jsonify(response), status_code
 
+def raw_success_response(message, raw_data, status_code=200, pagination=None):
+    """Create a standardized success response around data already encoded by fast_json"""
+    response = {
+        'success': True,
+        'message': message,
+        'timestamp': utcnow().isoformat(),
+        'data': msgspec.Raw(raw_data)
+    }
+    
+    if pagination is not None:
+        response['pagination'] = pagination
+    
+    return Response(fast_json(response), status=status_code, mimetype='application/json')
+
 def error_response(message="Error", status_code=400, error_code=None):
     """Create a standardized error response"""
     response = {
         'success': False,
         'error': message,
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': utcnow().isoformat()
     }
     
     if error_code:
@@ -47,7 +73,7 @@ def paginated_response(data, page, per_page, total, message="Data retrieved succ
             'has_next': page * per_page < total,
             'has_prev': page > 1
         },
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': utcnow().isoformat()
     }
     
     return jsonify(response), 200
@@ -101,16 +127,14 @@ def serialize_user(user, include_sensitive=False):
         user_data['batches'] = [serialize_batch(batch) for batch in getattr(user, 'batches', []) if getattr(batch, 'is_active', False)]
     return user_data
 
-def serialize_batch(batch):
-    """Serialize batch model"""
+def serialize_batch(batch, student_count=None):
+    """Serialize batch model; pass student_count to avoid loading batch.students"""
     batch_data = serialize_model(batch)
-    class_name = None
-    description = getattr(batch, 'description', None)
-    if description and ' - ' in description:
-        class_name = description.split(' - ')[0]
-    batch_data['class'] = class_name
-    students = getattr(batch, 'students', [])
-    batch_data['student_count'] = len([s for s in students if getattr(s, 'is_active', False)])
+    batch_data['class'] = getattr(batch, 'class_name', None)
+    if student_count is None:
+        students = getattr(batch, 'students', [])
+        student_count = len([s for s in students if getattr(s, 'is_active', False)])
+    batch_data['student_count'] = student_count
     batch_data['currentStudents'] = batch_data['student_count']
     batch_data['maxStudents'] = getattr(batch, 'max_students', 50) or 50
     batch_data['isActive'] = getattr(batch, 'is_active', True)